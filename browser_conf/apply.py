@@ -1,18 +1,197 @@
 """Main application logic for applying Zen Browser configuration."""
 
 import argparse
+import configparser
+import contextlib
+import functools
+import hashlib
+import io
 import json
 import os
+import re
+import select
 import shutil
 import subprocess
 import sys
+import tempfile
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any
-from urllib.request import urlopen
+from typing import Any, BinaryIO, Iterator
+from urllib.parse import urlsplit
+from urllib.request import getproxies, proxy_bypass, urlopen
 
 import yaml
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is used otherwise
+    orjson = None
+
+try:
+    import urllib3
+except ImportError:  # optional, urllib.request is used otherwise
+    urllib3 = None
+
+try:
+    import inotify_simple
+except ImportError:  # optional (Linux only), profiles.ini is polled otherwise
+    inotify_simple = None
+
+# Use libyaml's C parser when PyYAML was built with it
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+TEMPLATE_DIR = Path(__file__).parent.parent / "templates"
+
+# Certificate files picked up from certificates_dir
+CERTIFICATE_SUFFIXES = (".crt", ".pem")
+
+# Max buffers per os.writev call (IOV_MAX on Linux and the BSDs)
+_IOV_MAX = 1024
+
+# Sentinel for dict lookups where None is a valid value
+_MISSING = object()
+
+# Launcher scripts are small; anything this size or larger is the real binary
+LAUNCHER_SCRIPT_MAX_SIZE = 10000
+
+# Matches an `exec` line of a launcher script, capturing the exec'd command line
+_EXEC_LINE_RE = re.compile(rb"^.*?\bexec[ \t]+(.*)$", re.MULTILINE)
+# Matches each (optionally quoted) absolute zen path on that command line
+_ZEN_PATH_RE = re.compile(rb"""["']?(/[^\s"']*zen[^\s"']*)""", re.IGNORECASE)
+
+# Seconds to wait on theme store requests before giving up
+HTTP_TIMEOUT = 10
+
+# SQL for custom search engine bookmarks in places.sqlite. Kept as constants so
+# sqlite3's statement cache reuses the compiled statements across engines.
+_SELECT_KEYWORDS_SQL = "SELECT keyword, place_id FROM moz_keywords WHERE keyword IN ({placeholders})"
+_UPDATE_PLACE_SQL = "UPDATE moz_places SET url = ?, title = ? WHERE id = ?"
+_INSERT_PLACE_SQL = (
+    "INSERT INTO moz_places (url, title, rev_host, visit_count, hidden, typed, frecency, guid) "
+    "VALUES (?, ?, '', 0, 0, 0, -1, ?)"
+)
+_INSERT_BOOKMARK_SQL = (
+    "INSERT INTO moz_bookmarks (type, fk, parent, position, title, dateAdded, lastModified, guid) "
+    "VALUES (1, ?, 4, "
+    "(SELECT IFNULL(MAX(position), 0) + 1 FROM moz_bookmarks WHERE parent = 4), "
+    "?, ?, ?, ?)"
+)
+_INSERT_KEYWORD_SQL = "INSERT INTO moz_keywords (keyword, place_id, post_data) VALUES (?, ?, NULL)"
+
+
+def _compact_json(obj: Any) -> str:
+    """Serialize to JSON without whitespace, using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, separators=(',', ':'))
+
+
+def _wait_for_exit(proc: subprocess.Popen, timeout: float) -> int:
+    """Wait for a child process to exit, like proc.wait(timeout=...).
+
+    On Linux this blocks in select() on a pidfd instead of Popen.wait's sleep/poll loop.
+    Raises subprocess.TimeoutExpired if the process is still running after timeout.
+    """
+    try:
+        pidfd = os.pidfd_open(proc.pid)
+    except (AttributeError, OSError):  # not Linux >= 5.3, or already reaped
+        return proc.wait(timeout=timeout)
+
+    try:
+        ready, _, _ = select.select([pidfd], [], [], timeout)
+    finally:
+        os.close(pidfd)
+    if not ready:
+        raise subprocess.TimeoutExpired(proc.args, timeout)
+    return proc.wait()  # exited, just reap it
+
+
+def _write_bytes(path: Path, *chunks: bytes) -> None:
+    """Write byte chunks to a file straight through the fd, bypassing Python's io stack.
+
+    The chunks are submitted with gathered os.writev calls, so they never have to be
+    joined into one buffer first.
+    """
+    buffers = [memoryview(chunk) for chunk in chunks if chunk]
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        i = 0
+        while i < len(buffers):
+            written = os.writev(fd, buffers[i:i + _IOV_MAX])
+            # Skip fully written buffers and trim a partially written one
+            while written:
+                if written < len(buffers[i]):
+                    buffers[i] = buffers[i][written:]
+                    break
+                written -= len(buffers[i])
+                i += 1
+    finally:
+        os.close(fd)
+
+
+@functools.lru_cache(maxsize=4)
+def _find_certificates(certs_dir: str) -> tuple[str, ...]:
+    """Return absolute paths of the .crt/.pem files in certs_dir, sorted by name.
+
+    Uses one directory scan and resolves the directory once, not each file.
+    """
+    try:
+        entries = os.scandir(certs_dir)
+    except OSError:  # missing, not a directory, or unreadable
+        return ()
+
+    base = os.path.realpath(certs_dir)
+    with entries:
+        names = sorted(
+            entry.name for entry in entries
+            if entry.name.endswith(CERTIFICATE_SUFFIXES) and not entry.name.startswith(".") and entry.is_file()
+        )
+    return tuple(os.path.join(base, name) for name in names)
+
+
+def _new_http_pool():
+    """Create the urllib3 pool for theme store requests, or None to use urlopen.
+
+    Goes through the user's HTTPS proxy (HTTPS_PROXY) like urlopen does; hosts
+    listed in NO_PROXY are left to urlopen, see ZenConfig._open_url.
+    """
+    if urllib3 is None:
+        return None
+
+    pool_kw = {"maxsize": 4, "retries": urllib3.Retry(total=2), "timeout": HTTP_TIMEOUT}
+    https_proxy = getproxies().get("https")
+    if not https_proxy:
+        return urllib3.PoolManager(**pool_kw)
+    try:
+        return urllib3.ProxyManager(https_proxy, **pool_kw)
+    except urllib3.exceptions.ProxySchemeUnknown:
+        return None  # e.g. a socks:// or scheme-less proxy, leave it to urlopen
+
+
+def _guid() -> str:
+    """Generate a random GUID for new places/bookmarks rows."""
+    return str(uuid.uuid4())
+
+
+@functools.lru_cache(maxsize=1)
+def _get_env() -> Environment:
+    """Return the shared Jinja2 environment for the bundled templates."""
+    # Templates ship with the package, so there is no need to stat them per render.
+    # Only the HTML templates are autoescaped; user.js and policies.json are not HTML.
+    return Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        autoescape=select_autoescape(["html.j2"]),
+        auto_reload=False,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _get_template(name: str):
+    """Load and compile a template once per process."""
+    return _get_env().get_template(name)
 
 
 class ZenConfig:
@@ -23,11 +202,17 @@ class ZenConfig:
         self.config_path = config_path
         self.config = self._load_config()
         self.home = Path.home()
+        self._zen_install_path: Path | None = None
+        self._theme_store_future: Future[dict[str, Any]] | None = None
+        # Keep-alive connection pool for theme store requests (all on one host)
+        self._http = _new_http_pool()
+        # (path, st_mtime_ns, st_size) -> parsed profiles.ini, see _load_profiles_ini
+        self._profiles_ini_cache: tuple[tuple[Path, int | None, int | None], configparser.RawConfigParser] | None = None
 
     def _load_config(self) -> dict[str, Any]:
         """Load YAML configuration file."""
-        with open(self.config_path) as f:
-            return yaml.safe_load(f)
+        with open(self.config_path, "rb") as f:
+            return yaml.load(f, Loader=Loader)
 
     @staticmethod
     def _flatten_dict(d: dict, parent_key: str = "", sep: str = ".") -> dict:
@@ -49,23 +234,30 @@ class ZenConfig:
             -> {"view.compact": true, "view.compact.enable-at-startup": true}
                (has other keys, so "enabled" becomes parent value)
         """
-        items = []
-        for k, v in d.items():
-            new_key = f"{parent_key}{sep}{k}" if parent_key else k
-            if isinstance(v, dict):
-                # Special case: if dict has "enabled" key AND other keys
-                if "enabled" in v and len(v) > 1:
-                    # Assign the "enabled" value to the parent key
-                    items.append((new_key, v["enabled"]))
-                    # Continue flattening other keys
-                    remaining = {key: val for key, val in v.items() if key != "enabled"}
-                    items.extend(ZenConfig._flatten_dict(remaining, new_key, sep=sep).items())
-                else:
-                    # Normal recursive flattening (including when only "enabled" exists)
-                    items.extend(ZenConfig._flatten_dict(v, new_key, sep=sep).items())
+        items = {}
+        # Depth-first walk with an explicit stack of (key prefix, item iterator)
+        # pairs, so keys come out in the same order as a recursive walk would
+        stack = [(parent_key, iter(d.items()))]
+        while stack:
+            prefix, children = stack[-1]
+            for k, v in children:
+                new_key = f"{prefix}{sep}{k}" if prefix else k
+                if isinstance(v, dict):
+                    # Special case: if dict has "enabled" key AND other keys
+                    enabled = v.get("enabled", _MISSING)
+                    if enabled is not _MISSING and len(v) > 1:
+                        # Assign the "enabled" value to the parent key
+                        items[new_key] = enabled
+                        # Continue flattening other keys, skipping "enabled" in place
+                        stack.append((new_key, ((key, val) for key, val in v.items() if key != "enabled")))
+                    else:
+                        # Normal flattening (including when only "enabled" exists)
+                        stack.append((new_key, iter(v.items())))
+                    break
+                items[new_key] = v
             else:
-                items.append((new_key, v))
-        return dict(items)
+                stack.pop()
+        return items
 
     def detect_zen_paths(self) -> tuple[Path, Path]:
         """
@@ -86,14 +278,12 @@ class ZenConfig:
 
         # Check for profiles.ini
         profiles_ini = zen_dir / "profiles.ini"
-        profile_path = None
         profile_exists_in_ini = False
 
-        if profiles_ini.exists():
-            # Parse profiles.ini to find the profile
-            profile_path = self._parse_profiles_ini(profiles_ini, profile_name)
-            if profile_path:
-                profile_exists_in_ini = True
+        # Parse profiles.ini to find the profile
+        profile_path = self._parse_profiles_ini(self._load_profiles_ini(profiles_ini), profile_name)
+        if profile_path:
+            profile_exists_in_ini = True
 
         if not profile_path:
             # Create new profile directory
@@ -118,27 +308,61 @@ class ZenConfig:
 
         return zen_install_path, profile_path
 
-    def _parse_profiles_ini(self, profiles_ini: Path, profile_name: str) -> Path | None:
-        """Parse profiles.ini to find profile path."""
-        # Simple parser for profiles.ini
-        content = profiles_ini.read_text()
-        lines = content.split('\n')
+    @staticmethod
+    def _new_ini() -> configparser.RawConfigParser:
+        """Create an INI parser that preserves key case, as Firefox expects."""
+        cp = configparser.RawConfigParser(strict=False, interpolation=None)
+        cp.optionxform = str
+        return cp
+
+    @classmethod
+    def _read_ini(cls, ini_path: Path) -> configparser.RawConfigParser:
+        """Read an INI file. Missing files yield an empty parser."""
+        cp = cls._new_ini()
+        cp.read(ini_path, encoding="utf-8")
+        return cp
 
-        current_section = None
-        section_data = {}
+    @staticmethod
+    def _write_ini(ini_path: Path, cp: configparser.RawConfigParser) -> bool:
+        """Write an INI file in Firefox's key=value style.
 
-        for line in lines:
-            line = line.strip()
-            if line.startswith('[') and line.endswith(']'):
-                current_section = line[1:-1]
-                section_data[current_section] = {}
-            elif '=' in line and current_section:
-                key, value = line.split('=', 1)
-                section_data[current_section][key.strip()] = value.strip()
+        Returns False without touching the file if it already has this content.
+        """
+        buf = io.StringIO()
+        cp.write(buf, space_around_delimiters=False)
+        content = buf.getvalue().encode("utf-8")
 
+        try:
+            if ini_path.read_bytes() == content:
+                return False
+        except FileNotFoundError:
+            pass
+
+        _write_bytes(ini_path, content)
+        return True
+
+    def _load_profiles_ini(self, profiles_ini: Path) -> configparser.RawConfigParser:
+        """Read profiles.ini, reusing the last parse while the file is unchanged."""
+        # The size catches a rewrite that lands in the same mtime tick
+        try:
+            st = profiles_ini.stat()
+            key = (profiles_ini, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            key = (profiles_ini, None, None)
+
+        if self._profiles_ini_cache is not None and self._profiles_ini_cache[0] == key:
+            return self._profiles_ini_cache[1]
+
+        cp = self._read_ini(profiles_ini) if key[1] is not None else self._new_ini()
+        self._profiles_ini_cache = (key, cp)
+        return cp
+
+    def _parse_profiles_ini(self, cp: configparser.RawConfigParser, profile_name: str) -> Path | None:
+        """Find the profile path in parsed profiles.ini data."""
         # Find profile
-        for section, data in section_data.items():
+        for section in cp.sections():
             if section.startswith('Profile'):
+                data = cp[section]
                 if data.get('Name') == profile_name:
                     if data.get('IsRelative') == '1':
                         return self.home / ".zen" / data.get('Path', '')
@@ -152,93 +376,56 @@ class ZenConfig:
         profiles_ini = zen_dir / "profiles.ini"
 
         # Parse existing profiles.ini if it exists
-        existing_profiles = []
-        install_sections = {}  # Dict of install_hash -> {key: value}
-
-        if profiles_ini.exists():
-            content = profiles_ini.read_text()
-            lines = content.split('\n')
-
-            current_section = None
-            for line in lines:
-                line = line.strip()
-                if line.startswith('[') and line.endswith(']'):
-                    current_section = line[1:-1]
-                    if current_section.startswith('Profile'):
-                        existing_profiles.append({})
-                    elif current_section.startswith('Install'):
-                        # Extract install hash
-                        install_hash = current_section.replace('Install', '')
-                        install_sections[install_hash] = {}
-                elif '=' in line and current_section:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip()
-
-                    if current_section.startswith('Profile') and existing_profiles:
-                        existing_profiles[-1][key] = value
-                    elif current_section.startswith('Install'):
-                        install_hash = current_section.replace('Install', '')
-                        install_sections[install_hash][key] = value
-
-        # Determine relative path
-        relative_path = profile_path.relative_to(zen_dir)
+        existing = self._load_profiles_ini(profiles_ini)
+        existing_profiles = [dict(existing[s]) for s in existing.sections() if s.startswith('Profile')]
+        install_hashes = [s[len('Install'):] for s in existing.sections() if s.startswith('Install')]
+
+        # Determine relative path (as the string written to the INI)
+        relative_path = str(profile_path.relative_to(zen_dir))
 
         # Build new profiles.ini content
-        lines = ['[General]']
-        lines.append('StartWithLastProfile=1')
-        lines.append('Version=2')
-        lines.append('')
+        cp = self._new_ini()
+        cp['General'] = {'StartWithLastProfile': '1', 'Version': '2'}
 
         if update_only:
             # Just update Install sections, keep existing profiles as-is
             # But make sure our profile has Default=1
-            current_prof_num = 0
-            for i, prof in enumerate(existing_profiles):
-                lines.append(f'[Profile{current_prof_num}]')
-                for key, value in prof.items():
-                    # Remove Default from all profiles first
-                    if key == 'Default':
-                        continue
-                    lines.append(f'{key}={value}')
+            for prof_num, prof in enumerate(existing_profiles):
+                # Remove Default from all profiles first
+                prof.pop('Default', None)
                 # Add Default=1 to our profile
                 if prof.get('Name') == profile_name:
-                    lines.append('Default=1')
-                lines.append('')
-                current_prof_num += 1
+                    prof['Default'] = '1'
+                cp[f'Profile{prof_num}'] = prof
         else:
             # Add existing profiles (remove Default=1 from all)
-            current_prof_num = 0
-            for i, prof in enumerate(existing_profiles):
+            prof_num = 0
+            for prof in existing_profiles:
                 if prof.get('Name') == profile_name:
                     continue  # Skip if we're re-adding it
-                lines.append(f'[Profile{current_prof_num}]')
-                for key, value in prof.items():
-                    if key == 'Default':
-                        continue  # Remove Default flag from other profiles
-                    lines.append(f'{key}={value}')
-                lines.append('')
-                current_prof_num += 1
+                prof.pop('Default', None)  # Remove Default flag from other profiles
+                cp[f'Profile{prof_num}'] = prof
+                prof_num += 1
 
             # Add new/updated profile as default
-            lines.append(f'[Profile{current_prof_num}]')
-            lines.append(f'Name={profile_name}')
-            lines.append('IsRelative=1')
-            lines.append(f'Path={relative_path}')
-            lines.append('Default=1')
-            lines.append('')
+            cp[f'Profile{prof_num}'] = {
+                'Name': profile_name,
+                'IsRelative': '1',
+                'Path': relative_path,
+                'Default': '1',
+            }
 
         # Add ALL Install sections, updating them to point to our profile
         # Only write Install sections if they already exist (Zen will create them on first run)
-        for install_hash in sorted(install_sections.keys()):
-            lines.append(f'[Install{install_hash}]')
-            lines.append(f'Default={relative_path}')
-            lines.append('Locked=1')
-            lines.append('')
-
-        # Write profiles.ini
-        profiles_ini.write_text('\n'.join(lines))
-        if update_only:
+        for install_hash in sorted(install_hashes):
+            cp[f'Install{install_hash}'] = {'Default': relative_path, 'Locked': '1'}
+
+        # Write profiles.ini, keeping what we wrote as the cached parse
+        written = self._write_ini(profiles_ini, cp)
+        self._profiles_ini_cache = ((profiles_ini, profiles_ini.stat().st_mtime_ns), cp)
+        if not written:
+            print(f"profiles.ini already uses profile: {profile_name}")
+        elif update_only:
             print(f"Updated Install sections in profiles.ini to use profile: {profile_name}")
         else:
             print(f"Registered profile '{profile_name}' in profiles.ini")
@@ -248,52 +435,33 @@ class ZenConfig:
         installs_ini = zen_dir / "installs.ini"
         profiles_ini = zen_dir / "profiles.ini"
 
-        # Determine relative path
-        relative_path = profile_path.relative_to(zen_dir)
+        # Determine relative path (as the string written to the INI)
+        relative_path = str(profile_path.relative_to(zen_dir))
 
         # Get ALL install hashes from profiles.ini (there may be multiple for different installations)
-        install_hashes_from_profiles = set()
-        if profiles_ini.exists():
-            content = profiles_ini.read_text()
-            for line in content.split('\n'):
-                line = line.strip()
-                if line.startswith('[Install') and line.endswith(']'):
-                    install_hash = line[8:-1]  # Extract hash from [InstallXXXX]
-                    install_hashes_from_profiles.add(install_hash)
+        install_hashes_from_profiles = {
+            s[len('Install'):] for s in self._load_profiles_ini(profiles_ini).sections() if s.startswith('Install')
+        }
 
         # Parse existing installs.ini if it exists
-        install_sections = {}
-        if installs_ini.exists():
-            content = installs_ini.read_text()
-            lines = content.split('\n')
-
-            current_section = None
-            for line in lines:
-                line = line.strip()
-                if line.startswith('[') and line.endswith(']'):
-                    current_section = line[1:-1]
-                    install_sections[current_section] = {}
-                elif '=' in line and current_section:
-                    key, value = line.split('=', 1)
-                    install_sections[current_section][key.strip()] = value.strip()
+        install_sections = self._read_ini(installs_ini).sections()
 
         # Merge: use hashes from profiles.ini (which are the authoritative ones)
-        all_hashes = install_hashes_from_profiles if install_hashes_from_profiles else set(install_sections.keys())
+        all_hashes = install_hashes_from_profiles if install_hashes_from_profiles else set(install_sections)
 
         # Only write installs.ini if we have actual hashes
         # (Zen will create them on first run based on its own hash calculation)
         if all_hashes:
             # Update ALL installation sections to point to our profile
-            lines = []
+            cp = self._new_ini()
             for install_hash in sorted(all_hashes):
-                lines.append(f'[{install_hash}]')
-                lines.append(f'Default={relative_path}')
-                lines.append('Locked=1')
-                lines.append('')
+                cp[install_hash] = {'Default': relative_path, 'Locked': '1'}
 
             # Write installs.ini
-            installs_ini.write_text('\n'.join(lines))
-            print(f"Updated installs.ini ({len(all_hashes)} installation(s)) to use profile: {relative_path}")
+            if self._write_ini(installs_ini, cp):
+                print(f"Updated installs.ini ({len(all_hashes)} installation(s)) to use profile: {relative_path}")
+            else:
+                print(f"installs.ini already uses profile: {relative_path}")
         else:
             # Don't create installs.ini yet - let Zen create it with the correct hash
             if installs_ini.exists():
@@ -301,7 +469,13 @@ class ZenConfig:
             print("No installation hashes found - Zen will create installs.ini on first run")
 
     def _detect_zen_installation(self) -> Path:
-        """Detect Zen Browser installation directory."""
+        """Detect Zen Browser installation directory (cached per instance)."""
+        if self._zen_install_path is None:
+            self._zen_install_path = self._find_zen_installation()
+        return self._zen_install_path
+
+    def _find_zen_installation(self) -> Path:
+        """Search for the Zen Browser installation directory."""
         zen_path_config = self.config.get("profile", {}).get("zen_path", "auto")
 
         if zen_path_config != "auto":
@@ -311,36 +485,28 @@ class ZenConfig:
             else:
                 print(f"Warning: Configured Zen path {path} does not exist")
 
-        # Try to find via which command first (most reliable)
+        # Try to find via PATH lookup first (most reliable)
         try:
-            result = subprocess.run(
-                ["which", "zen-browser"],
-                capture_output=True,
-                text=True,
-                check=False
-            )
-            if result.returncode == 0:
-                zen_bin_path = Path(result.stdout.strip())
+            zen_bin = shutil.which("zen-browser")
+            if zen_bin is not None:
+                zen_bin_path = Path(zen_bin)
 
                 # Check if it's a shell script that execs the real binary
-                if zen_bin_path.exists() and zen_bin_path.stat().st_size < 10000:
-                    try:
-                        content = zen_bin_path.read_text()
-                        # Look for exec /path/to/zen lines
-                        for line in content.split('\n'):
-                            if 'exec' in line and ('zen' in line.lower() or 'browser' in line.lower()):
-                                # Extract path from exec command
-                                parts = line.split()
-                                for part in parts:
-                                    if 'zen' in part.lower() and '/' in part:
-                                        # Found the real binary path
-                                        real_bin = Path(part.strip('"\''))
-                                        if real_bin.exists():
-                                            install_dir = real_bin.parent
-                                            print(f"Found Zen Browser installation: {install_dir}")
-                                            return install_dir
-                    except Exception:
-                        pass
+                try:
+                    with open(zen_bin_path, "rb") as f:
+                        content = f.read(LAUNCHER_SCRIPT_MAX_SIZE)
+                except OSError:
+                    content = b""
+                if len(content) < LAUNCHER_SCRIPT_MAX_SIZE:
+                    # Look for exec /path/to/zen lines
+                    for line in _EXEC_LINE_RE.finditer(content):
+                        # Try each zen path left to right; the first one is the exec'd binary
+                        for match in _ZEN_PATH_RE.finditer(line.group(1)):
+                            real_bin = Path(os.fsdecode(match.group(1)))
+                            if real_bin.exists():
+                                install_dir = real_bin.parent
+                                print(f"Found Zen Browser installation: {install_dir}")
+                                return install_dir
 
                 # Fallback: use parent directory
                 zen_bin_path = zen_bin_path.resolve()
@@ -354,7 +520,7 @@ class ZenConfig:
                     print(f"Found Zen Browser installation: {install_dir}")
                     return install_dir
         except Exception as e:
-            print(f"Warning: Error detecting Zen installation via which: {e}")
+            print(f"Warning: Error detecting Zen installation via PATH: {e}")
 
         # Common installation paths for Zen Browser on Linux
         possible_paths = [
@@ -365,10 +531,10 @@ class ZenConfig:
             self.home / ".local/share/zen-browser",
         ]
 
-        for path in possible_paths:
-            if path.exists():
-                print(f"Found Zen Browser installation: {path}")
-                return path
+        path = next((p for p in possible_paths if p.exists()), None)
+        if path is not None:
+            print(f"Found Zen Browser installation: {path}")
+            return path
 
         print("Warning: Could not auto-detect Zen Browser installation path")
         print("Policies may need to be installed manually")
@@ -379,48 +545,43 @@ class ZenConfig:
         print("Generating user.js...")
 
         # Load template
-        template_dir = Path(__file__).parent.parent / "templates"
-        env = Environment(loader=FileSystemLoader(template_dir))
-        template = env.get_template("user.js.j2")
+        template = _get_template("user.js.j2")
 
-        workspaces = self.config.get("workspaces", [])
+        cfg = self.config
+        workspaces = cfg.get("workspaces", [])
 
         # New unified config format (nested)
         preferences = {}
         zen_preferences = {}
 
-        if "config" in self.config:
+        if (nested_config := cfg.get("config")) is not None:
             # Flatten the entire config section
-            flattened_config = self._flatten_dict(self.config["config"])
+            flattened_config = self._flatten_dict(nested_config)
 
-            # Separate zen.* preferences from regular preferences
+            # Separate zen.* preferences from regular preferences in one pass
             for key, value in flattened_config.items():
-                if key.startswith("zen."):
+                if key[:4] == "zen.":
                     # Remove "zen." prefix for zen_preferences
-                    zen_key = key[4:]  # Remove "zen." prefix
-                    zen_preferences[zen_key] = value
+                    zen_preferences[key[4:]] = value
                 else:
                     preferences[key] = value
         else:
             # Backward compatibility: support old format
-            preferences = self.config.get("preferences", {})
+            preferences = cfg.get("preferences", {})
 
             # Support old flat format: zen_preferences
-            if "zen_preferences" in self.config:
-                zen_preferences.update(self.config["zen_preferences"])
+            if (flat_zen := cfg.get("zen_preferences")) is not None:
+                zen_preferences.update(flat_zen)
 
             # Support old nested format: zen
-            if "zen" in self.config:
-                zen_nested = self.config["zen"]
-                flattened = self._flatten_dict(zen_nested)
-                zen_preferences.update(flattened)
+            if (zen_nested := cfg.get("zen")) is not None:
+                zen_preferences.update(self._flatten_dict(zen_nested))
 
         # Handle toolbar customization
         toolbar_state = None
-        if "toolbar" in self.config:
-            toolbar_config = self.config["toolbar"]
+        if (toolbar_config := cfg.get("toolbar")) is not None:
             # Convert toolbar config to JSON string for browser.uiCustomization.state
-            toolbar_state = json.dumps(toolbar_config, separators=(',', ':'))
+            toolbar_state = _compact_json(toolbar_config)
             print("  Including toolbar customization")
 
         user_js_content = template.render(
@@ -440,9 +601,7 @@ class ZenConfig:
         print("Generating policies.json...")
 
         # Load template
-        template_dir = Path(__file__).parent.parent / "templates"
-        env = Environment(loader=FileSystemLoader(template_dir))
-        template = env.get_template("policies.json.j2")
+        template = _get_template("policies.json.j2")
 
         # Render template
         extensions = self.config.get("extensions", {})
@@ -492,27 +651,32 @@ class ZenConfig:
                     print("Error: Failed to create distribution directory")
                     sys.exit(1)
 
-        # Write policies.json
-        temp_policies = Path("/tmp/policies.json")
-        temp_policies.write_text(policies_content)
-
         try:
-            # Try to copy without sudo first
-            shutil.copy(temp_policies, policies_path)
+            # Try to write without sudo first
+            policies_path.write_text(policies_content)
         except PermissionError:
             print("Need elevated permissions to install policies.json...")
+            # Stage in a uniquely named temp file so concurrent runs don't collide
+            with tempfile.NamedTemporaryFile(
+                mode="w", prefix="policies.", suffix=".json", delete=False
+            ) as temp_policies:
+                temp_policies.write(policies_content)
+            # NamedTemporaryFile is 0600 and cp keeps that mode on a new file,
+            # which would leave policies.json unreadable for Zen
+            os.chmod(temp_policies.name, 0o644)
             # Use sudo
             try:
                 subprocess.run(
-                    ["sudo", "cp", str(temp_policies), str(policies_path)],
+                    ["sudo", "cp", temp_policies.name, str(policies_path)],
                     check=True
                 )
             except subprocess.CalledProcessError:
                 print("Error: Failed to install policies.json")
                 sys.exit(1)
+            finally:
+                os.unlink(temp_policies.name)
 
         print(f"Installed: {policies_path}")
-        temp_policies.unlink()
 
     def create_search_engine_bookmarks(self, profile_path: Path) -> None:
         """Create bookmark keywords for custom search engines."""
@@ -535,7 +699,18 @@ class ZenConfig:
 
         try:
             conn = sqlite3.connect(places_db)
+            # One transaction for all engines; NORMAL sync is what Firefox itself uses with WAL
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("BEGIN")
             cursor = conn.cursor()
+            place_updates = []
+
+            # Look up which keywords already have bookmarks in a single query
+            keywords = [engine["keyword"] for engine in search_engines if engine.get("keyword")]
+            existing_places = dict(cursor.execute(
+                _SELECT_KEYWORDS_SQL.format(placeholders=",".join("?" * len(keywords))),
+                keywords
+            )) if keywords else {}
 
             for engine in search_engines:
                 keyword = engine.get("keyword")
@@ -546,60 +721,27 @@ class ZenConfig:
                     continue
 
                 # Check if bookmark with this keyword already exists
-                cursor.execute(
-                    "SELECT id FROM moz_keywords WHERE keyword = ?",
-                    (keyword,)
-                )
-                existing = cursor.fetchone()
-
-                if existing:
+                if keyword in existing_places:
                     print(f"  Updating: {name} ({keyword})")
-                    # Update existing bookmark
-                    keyword_id = existing[0]
-                    cursor.execute(
-                        "SELECT place_id FROM moz_keywords WHERE id = ?",
-                        (keyword_id,)
-                    )
-                    place_id = cursor.fetchone()[0]
-
-                    # Update URL
-                    cursor.execute(
-                        "UPDATE moz_places SET url = ?, title = ? WHERE id = ?",
-                        (url, name, place_id)
-                    )
+                    # Update existing bookmark URL (applied in one batch below)
+                    place_updates.append((url, name, existing_places[keyword]))
                 else:
                     print(f"  Creating: {name} ({keyword})")
 
                     # Create new place (URL)
-                    cursor.execute(
-                        "INSERT INTO moz_places (url, title, rev_host, visit_count, hidden, typed, frecency, guid) "
-                        "VALUES (?, ?, '', 0, 0, 0, -1, lower(hex(randomblob(8))) || '-' || "
-                        "lower(hex(randomblob(2))) || '-4' || substr(lower(hex(randomblob(2))),2) || '-' || "
-                        "substr('89ab',abs(random()) % 4 + 1, 1) || substr(lower(hex(randomblob(2))),2) || '-' || "
-                        "lower(hex(randomblob(6))))",
-                        (url, name)
-                    )
+                    cursor.execute(_INSERT_PLACE_SQL, (url, name, _guid()))
                     place_id = cursor.lastrowid
 
                     # Create bookmark in "Other Bookmarks" folder (id=4)
                     timestamp = int(datetime.now().timestamp() * 1000000)
-                    cursor.execute(
-                        "INSERT INTO moz_bookmarks (type, fk, parent, position, title, dateAdded, lastModified, guid) "
-                        "VALUES (1, ?, 4, "
-                        "(SELECT IFNULL(MAX(position), 0) + 1 FROM moz_bookmarks WHERE parent = 4), "
-                        "?, ?, ?, lower(hex(randomblob(8))) || '-' || "
-                        "lower(hex(randomblob(2))) || '-4' || substr(lower(hex(randomblob(2))),2) || '-' || "
-                        "substr('89ab',abs(random()) % 4 + 1, 1) || substr(lower(hex(randomblob(2))),2) || '-' || "
-                        "lower(hex(randomblob(6))))",
-                        (place_id, name, timestamp, timestamp)
-                    )
-                    bookmark_id = cursor.lastrowid
+                    cursor.execute(_INSERT_BOOKMARK_SQL, (place_id, name, timestamp, timestamp, _guid()))
 
                     # Create keyword
-                    cursor.execute(
-                        "INSERT INTO moz_keywords (keyword, place_id, post_data) VALUES (?, ?, NULL)",
-                        (keyword, place_id)
-                    )
+                    cursor.execute(_INSERT_KEYWORD_SQL, (keyword, place_id))
+                    existing_places[keyword] = place_id
+
+            if place_updates:
+                cursor.executemany(_UPDATE_PLACE_SQL, place_updates)
 
             conn.commit()
             conn.close()
@@ -609,19 +751,58 @@ class ZenConfig:
             print(f"  Warning: Could not create search engines: {e}")
             print("  You may need to create them manually or run the script after first browser launch.")
 
+    @contextlib.contextmanager
+    def _open_url(self, url: str) -> Iterator[BinaryIO]:
+        """Open a URL for streaming, reusing pooled connections when urllib3 is installed."""
+        # urlopen also covers hosts that skip the proxy (NO_PROXY)
+        if self._http is None or (
+            isinstance(self._http, urllib3.ProxyManager) and proxy_bypass(urlsplit(url).hostname or "")
+        ):
+            with urlopen(url, timeout=HTTP_TIMEOUT) as response:
+                yield response
+            return
+
+        response = self._http.request("GET", url, preload_content=False)
+        try:
+            if response.status >= 400:
+                raise urllib3.exceptions.HTTPError(f"HTTP Error {response.status}: {response.reason}")
+            yield response
+        finally:
+            response.release_conn()
+
     def fetch_theme_store(self) -> dict[str, Any]:
         """Fetch the Zen theme store themes.json."""
         theme_store_url = "https://raw.githubusercontent.com/zen-browser/theme-store/main/themes.json"
         try:
-            with urlopen(theme_store_url) as response:
-                return json.loads(response.read())
+            with self._open_url(theme_store_url) as response:
+                return json.load(response)
         except Exception as e:
             print(f"Warning: Could not fetch theme store: {e}")
             return {}
 
-    def find_mod_in_store(self, mod_config: dict, theme_store: dict) -> tuple[str, dict] | None:
+    def _prefetch_theme_store(self) -> None:
+        """Start fetching the theme store in a background thread."""
+        executor = ThreadPoolExecutor(max_workers=1)
+        self._theme_store_future = executor.submit(self.fetch_theme_store)
+        # Let the submitted fetch finish, but don't keep the pool around
+        executor.shutdown(wait=False)
+
+    @staticmethod
+    def _index_theme_store_by_name(theme_store: dict) -> dict[str, tuple[str, dict]]:
+        """Map theme names to (theme_id, theme_data), keeping the first theme per name."""
+        by_name = {}
+        for theme_id, theme_data in theme_store.items():
+            name = theme_data.get("name")
+            if name:
+                by_name.setdefault(name, (theme_id, theme_data))
+        return by_name
+
+    def find_mod_in_store(self, mod_config: dict, theme_store: dict, by_name: dict[str, tuple[str, dict]] | None = None) -> tuple[str, dict] | None:
         """Find a mod in the theme store by ID or name.
 
+        by_name is the index from _index_theme_store_by_name; pass it when looking
+        up several mods so the store is only indexed once.
+
         Returns tuple of (theme_id, theme_data) or None if not found.
         """
         mod_id = mod_config.get("id")
@@ -634,45 +815,51 @@ class ZenConfig:
 
         # Search by name
         if mod_name:
-            for theme_id, theme_data in theme_store.items():
-                if theme_data.get("name") == mod_name:
-                    return (theme_id, theme_data)
+            if by_name is None:
+                by_name = self._index_theme_store_by_name(theme_store)
+            return by_name.get(mod_name)
 
         return None
 
     def download_file(self, url: str, dest_path: Path) -> bool:
         """Download a file from URL to destination path."""
         try:
-            with urlopen(url) as response:
-                dest_path.write_bytes(response.read())
+            with self._open_url(url) as response, open(dest_path, "wb") as f:
+                shutil.copyfileobj(response, f, 1 << 16)
             return True
         except Exception as e:
             print(f"  Warning: Could not download {url}: {e}")
             return False
 
     def install_zen_mods(self, profile_path: Path) -> list[dict]:
-        """Open Zen mod installation pages in browser.
+        """Look up the installation pages of configured Zen mods.
 
-        Returns a list of mods that need manual installation.
+        The pages are opened by apply() together with the setup guide.
+
+        Returns a list of mods (name, id, url) that need manual installation.
         """
         zen_mods = self.config.get("zen_mods", [])
 
-        print("Opening Zen mods for installation...")
+        print("Looking up Zen mods for installation...")
 
         if not zen_mods:
             print("  No mods configured")
             return []
 
-        # Fetch theme store to look up mod IDs
-        theme_store = self.fetch_theme_store()
+        # Fetch theme store to look up mod IDs (usually already prefetched by apply)
+        if self._theme_store_future is not None:
+            theme_store = self._theme_store_future.result()
+        else:
+            theme_store = self.fetch_theme_store()
         if not theme_store:
             print("  Warning: Could not fetch theme store, skipping mod configuration")
             return []
 
-        # Resolve mod names/IDs from config and open installation pages
-        opened_mods = []
+        # Resolve mod names/IDs from config
+        by_name = self._index_theme_store_by_name(theme_store)
+        found_mods = []
         for mod_config in zen_mods:
-            result = self.find_mod_in_store(mod_config, theme_store)
+            result = self.find_mod_in_store(mod_config, theme_store, by_name)
             if not result:
                 mod_name = mod_config.get("name", "Unknown")
                 print(f"  Warning: Mod '{mod_name}' not found in theme store, skipping")
@@ -681,27 +868,14 @@ class ZenConfig:
             theme_id, theme_data = result
             theme_name = theme_data.get("name", mod_config.get("name", "Unknown"))
 
-            # Open mod installation page in Zen Browser
-            mod_url = f"https://zen-browser.app/mods/{theme_id}/"
-            try:
-                subprocess.Popen(
-                    ['zen-browser', mod_url],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL
-                )
-                print(f"  Opened: {theme_name}")
-                opened_mods.append({
-                    "name": theme_name,
-                    "id": theme_id,
-                    "url": mod_url
-                })
-            except Exception as e:
-                print(f"  Warning: Could not open browser for '{theme_name}': {e}")
+            print(f"  Found: {theme_name}")
+            found_mods.append({
+                "name": theme_name,
+                "id": theme_id,
+                "url": f"https://zen-browser.app/mods/{theme_id}/"
+            })
 
-        if opened_mods:
-            print(f"\n  Opened {len(opened_mods)} mod(s) in browser - click 'Install' on each page")
-
-        return opened_mods
+        return found_mods
 
     def get_certificate_paths(self) -> list[str]:
         """Get list of certificate file paths for Firefox policies.
@@ -716,16 +890,14 @@ class ZenConfig:
         if not certs_dir.is_absolute():
             certs_dir = self.config_path.parent / certs_dir
 
-        if not certs_dir.exists():
-            return []
-
-        # Find all certificate files and return as absolute paths
-        cert_files = list(certs_dir.glob("*.crt")) + list(certs_dir.glob("*.pem"))
-        return [str(cert_file.resolve()) for cert_file in cert_files]
+        return list(_find_certificates(str(certs_dir)))
 
     def generate_setup_guide(self, zen_dir: Path, workspaces: list[dict]) -> Path:
         """Generate an HTML setup guide for manual configuration steps.
 
+        The guide is only re-rendered when the workspaces or the template changed
+        since the last run (tracked in .setup-guide.hash next to the guide).
+
         Args:
             zen_dir: Path to Zen profile directory
             workspaces: List of workspace configurations from config
@@ -734,245 +906,128 @@ class ZenConfig:
             Path to generated setup guide
         """
         guide_path = zen_dir / "setup-guide.html"
+        hash_path = zen_dir / ".setup-guide.hash"
+
+        # Skip rendering if the existing guide was built from the same inputs
+        template_name = "setup-guide.html.j2"
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update((TEMPLATE_DIR / template_name).read_bytes())
+        digest.update(json.dumps(workspaces, sort_keys=True, default=str).encode("utf-8"))
+        guide_hash = digest.hexdigest()
+        try:
+            if guide_path.exists() and hash_path.read_text() == guide_hash:
+                return guide_path
+        except FileNotFoundError:
+            pass
 
-        # Build HTML content
-        html_parts = [
-            '<!DOCTYPE html>',
-            '<html>',
-            '<head>',
-            '    <meta charset="UTF-8">',
-            '    <title>Zen Browser Setup Guide</title>',
-            '    <style>',
-            '        body {',
-            '            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;',
-            '            max-width: 800px;',
-            '            margin: 40px auto;',
-            '            padding: 20px;',
-            '            background: #1a1a1a;',
-            '            color: #e0e0e0;',
-            '        }',
-            '        h1 { color: #6b9eff; }',
-            '        h2 { color: #8ab4ff; margin-top: 30px; }',
-            '        h3 { color: #a0c4ff; margin-top: 20px; }',
-            '        h4 { color: #b8d4ff; margin-top: 15px; margin-bottom: 10px; }',
-            '        .step {',
-            '            background: #2a2a2a;',
-            '            border-left: 4px solid #6b9eff;',
-            '            padding: 15px;',
-            '            margin: 15px 0;',
-            '            border-radius: 4px;',
-            '        }',
-            '        .checkbox-item {',
-            '            margin: 10px 0;',
-            '            padding: 8px;',
-            '            background: #333;',
-            '            border-radius: 4px;',
-            '        }',
-            '        input[type="checkbox"] {',
-            '            margin-right: 10px;',
-            '            transform: scale(1.2);',
-            '        }',
-            '        a { color: #6b9eff; text-decoration: none; }',
-            '        a:hover { text-decoration: underline; }',
-            '        code {',
-            '            background: #333;',
-            '            padding: 2px 6px;',
-            '            border-radius: 3px;',
-            '            font-family: "Courier New", monospace;',
-            '        }',
-            '        table {',
-            '            width: 100%;',
-            '            border-collapse: collapse;',
-            '            margin: 15px 0;',
-            '            background: #2a2a2a;',
-            '            border-radius: 4px;',
-            '            overflow: hidden;',
-            '        }',
-            '        th, td {',
-            '            padding: 12px;',
-            '            text-align: left;',
-            '            border-bottom: 1px solid #3a3a3a;',
-            '        }',
-            '        th {',
-            '            background: #333;',
-            '            color: #6b9eff;',
-            '            font-weight: 600;',
-            '        }',
-            '        tr:last-child td {',
-            '            border-bottom: none;',
-            '        }',
-            '        tr:hover {',
-            '            background: #2f2f2f;',
-            '        }',
-            '        .complete-msg {',
-            '            background: #2a4a2a;',
-            '            border-left: 4px solid #4ade80;',
-            '            padding: 15px;',
-            '            margin-top: 30px;',
-            '            border-radius: 4px;',
-            '        }',
-            '    </style>',
-            '</head>',
-            '<body>',
-            '    <h1>Zen Browser Setup Guide</h1>',
-            '    <p>Your declarative configuration has been applied! Complete these final manual steps:</p>',
-        ]
-
-        # Add manual configuration sections
-        workspace_section_start = [
-            '    <h2>1. Configure Workspaces</h2>',
-            '    <div class="step">',
+        # Load template
+        template = _get_template(template_name)
+
+        # Resolve each workspace's fields once, as
+        # (name, icon, default container, essentials) rows shared by all sections
+        workspace_rows = [
+            (
+                ws.get('name', 'Unnamed'),
+                ws.get('icon', 'Not specified'),
+                ws.get('default_container', 'None'),
+                ws.get('essentials') or (),
+            )
+            for ws in workspaces
         ]
 
-        if workspaces:
-            workspace_section_start.extend([
-                f'        <p>You have <strong>{len(workspaces)}</strong> workspace(s) configured. Set them up as follows:</p>',
-                '        <h3>Configured Workspaces</h3>',
-                '        <table>',
-                '            <thead>',
-                '                <tr>',
-                '                    <th>Name</th>',
-                '                    <th>Icon</th>',
-                '                    <th>Default Container</th>',
-                '                </tr>',
-                '            </thead>',
-                '            <tbody>',
-            ])
-
-            for ws in workspaces:
-                name = ws.get('name', 'Unnamed')
-                icon = ws.get('icon', 'Not specified')
-                container = ws.get('default_container', 'None')
-                workspace_section_start.extend([
-                    '                <tr>',
-                    f'                    <td><strong>{name}</strong></td>',
-                    f'                    <td>{icon}</td>',
-                    f'                    <td>{container}</td>',
-                    '                </tr>',
-                ])
-
-            workspace_section_start.extend([
-                '            </tbody>',
-                '        </table>',
-            ])
-        else:
-            workspace_section_start.append('        <p>No workspaces configured in your config file.</p>')
-
-        workspace_section_start.extend([
-            '        <h3>Setup Instructions</h3>',
-            '        <ol>',
-            '            <li>Click the <strong>Workspaces</strong> button in the sidebar (or press the keyboard shortcut)</li>',
-            '            <li>Click <strong>Create New Workspace</strong></li>',
-            '            <li>Name the workspace according to the table above</li>',
-            '            <li>Right-click the workspace icon to change it (select the icon from the table)</li>',
-            '            <li>If specified, set the default container for the workspace:',
-            '                <ul>',
-            '                    <li>Open a new tab in the workspace</li>',
-            '                    <li>Click the container icon in the address bar</li>',
-            '                    <li>Select the appropriate container</li>',
-            '                    <li>Future tabs in this workspace will use this container by default</li>',
-            '                </ul>',
-            '            </li>',
-            '            <li>Repeat for each workspace in your configuration</li>',
-            '            <li>Organize your existing tabs by dragging them to the appropriate workspaces</li>',
-            '        </ol>',
-            '    </div>',
-        ])
-
-        html_parts.extend(workspace_section_start)
-
-        # Essential tabs section
-        essentials_section = [
-            '    <h2>2. Pin Essential Tabs</h2>',
-            '    <div class="step">',
+        # Collect all essentials from workspaces
+        workspace_essentials = [
+            (name, essentials) for name, _, _, essentials in workspace_rows if essentials
         ]
 
-        # Collect all essentials from workspaces
-        workspace_essentials = []
-        for ws in workspaces:
-            ws_name = ws.get('name', 'Unnamed')
-            ws_essentials = ws.get('essentials', [])
-            if ws_essentials:
-                workspace_essentials.append({
-                    'name': ws_name,
-                    'essentials': ws_essentials
-                })
-
-        if workspace_essentials:
-            essentials_section.extend([
-                f'        <p>You have essential tabs configured across <strong>{len(workspace_essentials)}</strong> workspace(s).</p>',
-                '        <h3>Essential Tabs by Workspace</h3>',
-            ])
-
-            # Create a table for each workspace with essentials
-            for ws_data in workspace_essentials:
-                ws_name = ws_data['name']
-                essentials = ws_data['essentials']
-
-                essentials_section.extend([
-                    f'        <h4>{ws_name} Workspace</h4>',
-                    '        <table>',
-                    '            <thead>',
-                    '                <tr>',
-                    '                    <th>#</th>',
-                    '                    <th>URL</th>',
-                    '                </tr>',
-                    '            </thead>',
-                    '            <tbody>',
-                ])
-
-                for idx, url in enumerate(essentials, 1):
-                    essentials_section.extend([
-                        '                <tr>',
-                        f'                    <td>{idx}</td>',
-                        f'                    <td><a href="{url}" target="_blank">{url}</a></td>',
-                        '                </tr>',
-                    ])
-
-                essentials_section.extend([
-                    '            </tbody>',
-                    '        </table>',
-                ])
-
-            essentials_section.extend([
-                '        <h3>Setup Instructions</h3>',
-                '        <p><strong>Important:</strong> Essential tabs must be pinned in the correct workspace.</p>',
-                '        <ol>',
-                '            <li>Switch to the <strong>first workspace</strong> listed above (click on it in the sidebar)</li>',
-                '            <li>Click on each URL in the table above to open it in a new tab</li>',
-                '            <li>Once all tabs are open, right-click each tab</li>',
-                '            <li>Select <strong>Pin as Essential</strong> from the context menu</li>',
-                '            <li>The tab will become an essential tab (pinned and always visible)</li>',
-                '            <li>Repeat this process for each workspace listed above</li>',
-                '        </ol>',
-                '        <p><em>Tip: Essential tabs will appear at the top of your tab bar and persist across sessions.</em></p>',
-            ])
-        else:
-            essentials_section.extend([
-                '        <p>No essential tabs configured in your workspaces.</p>',
-                '        <p>To add essential tabs:</p>',
-                '        <ol>',
-                '            <li>Open the tabs you want to pin</li>',
-                '            <li>Right-click each tab</li>',
-                '            <li>Select <strong>Pin as Essential</strong></li>',
-                '        </ol>',
-            ])
-
-        essentials_section.append('    </div>')
-        html_parts.extend(essentials_section)
-
-        html_parts.extend([
-            '    <div class="complete-msg">',
-            '        <strong>All done?</strong> You can delete this file once you\'ve completed all steps.',
-            '    </div>',
-            '</body>',
-            '</html>',
-        ])
-
-        # Write the HTML file
-        guide_path.write_text('\n'.join(html_parts))
+        # Write the HTML file, streaming the rendered chunks without joining them
+        chunks = template.generate(
+            workspace_rows=workspace_rows,
+            workspace_essentials=workspace_essentials,
+        )
+        _write_bytes(guide_path, *(chunk.encode("utf-8") for chunk in chunks))
+        _write_bytes(hash_path, guide_hash.encode("ascii"))
         return guide_path
 
+    @staticmethod
+    def _has_install_sections(profiles_ini: Path) -> bool:
+        """Check whether profiles.ini has any [Install...] section yet."""
+        try:
+            return b'[Install' in profiles_ini.read_bytes()
+        except FileNotFoundError:
+            return False
+
+    def _wait_for_install_sections(self, profiles_ini: Path, max_wait: float) -> float | None:
+        """Wait for Zen to write Install sections to profiles.ini.
+
+        Uses inotify when inotify_simple is installed, polling otherwise.
+        Returns the seconds waited, or None on timeout.
+        """
+        if inotify_simple is not None:
+            return self._watch_for_install_sections(profiles_ini, max_wait)
+        return self._poll_for_install_sections(profiles_ini, max_wait)
+
+    def _watch_for_install_sections(self, profiles_ini: Path, max_wait: float) -> float | None:
+        """Block on inotify events for profiles.ini until Install sections appear.
+
+        Falls back to polling if an inotify instance or watch can't be created
+        (e.g. EMFILE/ENOSPC once the per-user inotify limits are used up).
+        """
+        import time
+
+        start = time.monotonic()
+        flags = inotify_simple.flags
+        try:
+            inotify = inotify_simple.INotify()
+        except OSError:
+            return self._poll_for_install_sections(profiles_ini, max_wait)
+
+        with inotify:
+            # Watch the directory: Zen may create or rename profiles.ini into place
+            try:
+                inotify.add_watch(profiles_ini.parent, flags.CREATE | flags.MODIFY | flags.CLOSE_WRITE | flags.MOVED_TO)
+            except OSError:
+                return self._poll_for_install_sections(profiles_ini, max_wait)
+
+            # The file may have been written before the watch was set up
+            if self._has_install_sections(profiles_ini):
+                return time.monotonic() - start
+
+            while (remaining := max_wait - (time.monotonic() - start)) > 0:
+                events = inotify.read(timeout=int(remaining * 1000))
+                if any(event.name == profiles_ini.name for event in events) and self._has_install_sections(profiles_ini):
+                    return time.monotonic() - start
+
+        return None
+
+    def _poll_for_install_sections(self, profiles_ini: Path, max_wait: float) -> float | None:
+        """Poll profiles.ini every 0.5s until Install sections appear."""
+        import time
+
+        interval = 0.5
+        waited = 0
+        last_stamp = None
+
+        while waited < max_wait:
+            time.sleep(interval)
+            waited += interval
+
+            # Only re-read profiles.ini once Zen has actually written to it. The size
+            # catches a write landing in the same mtime tick as the truncate before it.
+            try:
+                st = profiles_ini.stat()
+            except FileNotFoundError:
+                continue
+            stamp = (st.st_mtime_ns, st.st_size)
+            if stamp == last_stamp:
+                continue
+            last_stamp = stamp
+
+            if self._has_install_sections(profiles_ini):
+                return waited
+
+        return None
+
     def _bootstrap_install_sections(self, zen_dir: Path, profile_path: Path, zen_install_path: Path) -> bool:
         """
         Bootstrap Install sections by launching Zen Browser briefly.
@@ -982,16 +1037,13 @@ class ZenConfig:
         profiles_ini = zen_dir / "profiles.ini"
 
         # Check if Install sections already exist
-        if profiles_ini.exists():
-            content = profiles_ini.read_text()
-            if '[Install' in content:
-                return False  # Install sections already exist
+        if self._has_install_sections(profiles_ini):
+            return False  # Install sections already exist
 
         print("\nNo installation hash found. Launching Zen Browser to generate it...")
         print("(This will take a few seconds)")
 
         import signal
-        import time
 
         try:
             # Launch Zen Browser in the background
@@ -999,41 +1051,30 @@ class ZenConfig:
                 ['zen-browser'],
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL,
-                preexec_fn=os.setpgrp  # Create new process group
+                start_new_session=True  # Own session/process group, pgid == pid
             )
 
-            # Wait for Install sections to appear (max 15 seconds)
-            max_wait = 15
-            interval = 0.5
-            waited = 0
-
-            while waited < max_wait:
-                time.sleep(interval)
-                waited += interval
-
-                if profiles_ini.exists():
-                    content = profiles_ini.read_text()
-                    if '[Install' in content:
-                        print(f"Installation hash detected after {waited:.1f}s")
-                        break
-
-            # Kill Zen Browser
             try:
-                os.killpg(os.getpgid(proc.pid), signal.SIGTERM)
-                proc.wait(timeout=5)
-            except:
+                # Wait for Install sections to appear (max 15 seconds)
+                waited = self._wait_for_install_sections(profiles_ini, max_wait=15)
+                if waited is not None:
+                    print(f"Installation hash detected after {waited:.1f}s")
+            finally:
+                # Kill Zen Browser, even if waiting failed
                 try:
-                    os.killpg(os.getpgid(proc.pid), signal.SIGKILL)
+                    os.killpg(proc.pid, signal.SIGTERM)
+                    _wait_for_exit(proc, timeout=5)
                 except:
-                    pass
+                    try:
+                        os.killpg(proc.pid, signal.SIGKILL)
+                    except:
+                        pass
 
-            print("Zen Browser closed")
+                print("Zen Browser closed")
 
             # Verify Install sections were created
-            if profiles_ini.exists():
-                content = profiles_ini.read_text()
-                if '[Install' in content:
-                    return True
+            if self._has_install_sections(profiles_ini):
+                return True
 
             print("Warning: Installation hash not detected. You may need to run the script again after launching Zen.")
             return False
@@ -1045,9 +1086,15 @@ class ZenConfig:
 
     def apply(self) -> None:
         """Apply configuration to Zen Browser profile."""
-        print("=" * 60)
-        print("Zen Browser Configuration Application")
-        print("=" * 60)
+        sys.stdout.write(
+            f"{'=' * 60}\n"
+            "Zen Browser Configuration Application\n"
+            f"{'=' * 60}\n"
+        )
+
+        # Start the theme store download now so it overlaps with the local work below
+        if self.config.get("zen_mods"):
+            self._prefetch_theme_store()
 
         # Detect paths
         zen_install_path, profile_path = self.detect_zen_paths()
@@ -1072,38 +1119,44 @@ class ZenConfig:
             self._register_profile_in_ini(zen_dir, profile_name, profile_path, zen_install_path, update_only=True)
             self._update_installs_ini(zen_dir, profile_path, zen_install_path)
 
-        # Generate and open setup guide FIRST (so mod tabs appear on top)
+        # Generate setup guide
         print()
         workspaces = self.config.get("workspaces", [])
         guide_path = self.generate_setup_guide(zen_dir, workspaces)
-        print(f"Generated setup guide: {guide_path}")
+        print(f"Setup guide: {guide_path}")
 
-        # Open setup guide in browser
+        # Look up mod installation pages
+        print()
+        mods = self.install_zen_mods(profile_path)
+
+        # Open setup guide and mod pages with a single browser launch, one tab each
+        # (guide FIRST, so mod tabs appear on top)
         try:
             subprocess.Popen(
-                ['zen-browser', str(guide_path)],
+                ['zen-browser', str(guide_path), *(mod["url"] for mod in mods)],
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL
             )
             print("Opened setup guide in browser")
+            if mods:
+                print(f"Opened {len(mods)} mod(s) in browser - click 'Install' on each page")
         except Exception as e:
             print(f"Warning: Could not open setup guide automatically: {e}")
             print(f"Please open manually: {guide_path}")
-
-        # Open mod installation pages (will appear on top of setup guide)
-        print()
-        self.install_zen_mods(profile_path)
-
-        print()
-        print("=" * 60)
-        print("Configuration applied successfully!")
-        print("=" * 60)
-        print("\nNext steps:")
-        print("1. Complete the manual steps in the setup guide")
-        print("2. Extensions will be automatically installed on first launch")
-        print("3. Preferences from user.js will be applied")
-        print("4. Custom search engines will be available (type keyword + space + search term)")
-        print("\nNote: Some settings may require a browser restart to take effect.")
+            for mod in mods:
+                print(f"  {mod['name']}: {mod['url']}")
+
+        sys.stdout.write(
+            f"\n{'=' * 60}\n"
+            "Configuration applied successfully!\n"
+            f"{'=' * 60}\n"
+            "\nNext steps:\n"
+            "1. Complete the manual steps in the setup guide\n"
+            "2. Extensions will be automatically installed on first launch\n"
+            "3. Preferences from user.js will be applied\n"
+            "4. Custom search engines will be available (type keyword + space + search term)\n"
+            "\nNote: Some settings may require a browser restart to take effect.\n"
+        )
 
 
 def main():
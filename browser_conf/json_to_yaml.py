@@ -8,33 +8,48 @@ Usage:
     4. Run: python json_to_yaml.py
     5. Paste the JSON and press Ctrl+D
     6. Copy the YAML output into your config.yaml under 'toolbar:'
+
+Prompts are only shown (on stderr) when stdin is a terminal, so it also works
+in a pipeline: json-to-yaml < state.json > toolbar.yaml
 """
 
 import json
 import sys
+import textwrap
+
 import yaml
 
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is used otherwise
+    orjson = None
+
+# Use libyaml's C emitter when PyYAML was built with it
+Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
 
 def json_to_yaml():
     """Convert JSON from stdin to YAML on stdout."""
-    print("Paste your browser.uiCustomization.state JSON (press Ctrl+D when done):")
-    print()
+    interactive = sys.stdin.isatty()
+    if interactive:
+        print("Paste your browser.uiCustomization.state JSON (press Ctrl+D when done):", file=sys.stderr)
+        print(file=sys.stderr)
 
-    # Read JSON from stdin
+    # Read JSON from stdin (raw bytes, both parsers handle UTF-8 themselves)
     try:
-        json_str = sys.stdin.read()
-        data = json.loads(json_str)
-    except json.JSONDecodeError as e:
+        json_bytes = sys.stdin.buffer.read()
+        data = orjson.loads(json_bytes) if orjson is not None else json.loads(json_bytes)
+    except ValueError as e:  # JSONDecodeError, or undecodable bytes
         print(f"Error: Invalid JSON - {e}", file=sys.stderr)
         sys.exit(1)
 
     # Convert to YAML
-    print("\n# Copy this into your config.yaml under 'toolbar:':")
+    if interactive:
+        print("\n# Copy this into your config.yaml under 'toolbar:':", file=sys.stderr)
     print("toolbar:")
-    yaml_str = yaml.dump(data, default_flow_style=False, sort_keys=False, indent=2)
-    # Indent everything by 2 spaces
-    for line in yaml_str.splitlines():
-        print(f"  {line}")
+    yaml_str = yaml.dump(data, Dumper=Dumper, default_flow_style=False, sort_keys=False, indent=2)
+    # Indent everything by 2 spaces (including blank lines) in a single write
+    sys.stdout.write(textwrap.indent(yaml_str, "  ", lambda line: True))
 
 
 if __name__ == "__main__":